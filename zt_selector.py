@@ -6,13 +6,28 @@
 """
 
 import requests
-import json
-import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import copy
+import hashlib
+import numpy as np
+import xlsxwriter
 import time
 import os
 import random
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson as _json
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    import json as _json
+
+try:
+    from numba import njit
+except ImportError:  # numba为可选依赖，未安装时使用NumPy实现
+    njit = None
 
 # 配置日志
 logging.basicConfig(
@@ -25,6 +40,21 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _score_kernel(volume_ratio, turnover_rate, continuous_limit_up, amount, market_cap,
+                  base_score, volume_ratio_weight, turnover_rate_weight,
+                  continuous_limit_up_weight, amount_weight, amount_max_score):
+    """评分计算内核，输入均为float64数组和浮点权重"""
+    return (base_score
+            + volume_ratio * volume_ratio_weight
+            + turnover_rate * turnover_rate_weight
+            + continuous_limit_up * continuous_limit_up_weight
+            + np.minimum(amount * amount_weight, amount_max_score)
+            + ((market_cap >= 10) & (market_cap <= 50)) * 10.0
+            + ((market_cap > 50) & (market_cap <= 100)) * 5.0)
+
+if njit is not None:
+    _score_kernel = njit(cache=True, fastmath=True)(_score_kernel)
+
 class ZTSelector:
     def __init__(self, config_file="config.json"):
         self.headers = {
@@ -33,14 +63,23 @@ class ZTSelector:
         }
         self.stock_api = 'http://82.push2.eastmoney.com/api/qt/clist/get'
         
+        # 复用HTTP会话，保持长连接并在服务端错误时自动重试
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                              max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504]))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
         # 加载配置文件
         self.config = self.load_config(config_file)
         
         self.output_dir = self.config["output"]["output_dir"]
+        self._cache_dir = os.path.join(self.output_dir, '.cache')
         
-        # 确保输出目录存在
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
+        # 确保输出目录存在，并缓存其绝对路径
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._abs_output_dir = os.path.abspath(self.output_dir)
     
     def load_config(self, config_file):
         """加载配置文件"""
@@ -64,24 +103,27 @@ class ZTSelector:
             "output": {
                 "top_count": 10,
                 "output_dir": "output",
-                "auto_open_excel": True
+                "auto_open_excel": True,
+                "cache_ttl": 60
             }
         }
         
-        # 储存最终使用的配置
-        final_config = default_config.copy()
+        # 储存最终使用的配置(深拷贝，避免修改默认配置)
+        final_config = copy.deepcopy(default_config)
         
         try:
             if os.path.exists(config_file):
-                # 尝试以不同编码读取文件
-                encodings = ['utf-8', 'utf-8-sig', 'gbk', 'cp1252']
+                # 只读取一次文件内容，再在内存中尝试以不同编码解码(utf-8-sig兼容带BOM和不带BOM的UTF-8)
+                with open(config_file, 'rb') as f:
+                    raw_content = f.read()
+                
+                encodings = ['utf-8-sig', 'gbk', 'cp1252']
                 file_content = None
                 
                 for encoding in encodings:
                     try:
-                        with open(config_file, 'r', encoding=encoding) as f:
-                            file_content = f.read()
-                            break
+                        file_content = raw_content.decode(encoding)
+                        break
                     except UnicodeDecodeError:
                         continue
                 
@@ -91,26 +133,15 @@ class ZTSelector:
                 
                 # 解析JSON
                 try:
-                    loaded_config = json.loads(file_content)
-                except json.JSONDecodeError as e:
+                    loaded_config = _json.loads(file_content)
+                except _json.JSONDecodeError as e:
                     logger.error(f"配置文件JSON格式错误: {e}")
                     return default_config
                 
-                # 逐层合并配置，使用默认值填充缺失项
-                if "filter" in loaded_config:
-                    for key, value in loaded_config["filter"].items():
-                        if key in default_config["filter"]:
-                            final_config["filter"][key] = value
-                
-                if "score" in loaded_config:
-                    for key, value in loaded_config["score"].items():
-                        if key in default_config["score"]:
-                            final_config["score"][key] = value
-                
-                if "output" in loaded_config:
-                    for key, value in loaded_config["output"].items():
-                        if key in default_config["output"]:
-                            final_config["output"][key] = value
+                # 逐个部分合并配置，只接受默认配置中存在的项，缺失项使用默认值
+                for section in ("filter", "score", "output"):
+                    final_config[section].update({key: value for key, value in loaded_config.get(section, {}).items()
+                                                  if key in default_config[section]})
                 
                 # 验证重要配置值的类型和范围
                 self._validate_config(final_config)
@@ -175,6 +206,10 @@ class ZTSelector:
                 logger.warning(f"auto_open_excel应为布尔值，当前值: {output_config['auto_open_excel']}，使用默认值True")
                 output_config["auto_open_excel"] = True
             
+            if not isinstance(output_config["cache_ttl"], (int, float)) or output_config["cache_ttl"] < 0:
+                logger.warning(f"cache_ttl应为非负数值，当前值: {output_config['cache_ttl']}，使用默认值60")
+                output_config["cache_ttl"] = 60
+            
         except Exception as e:
             logger.error(f"验证配置时出错: {e}")
             # 出错时不进行任何修改，保留原配置
@@ -192,28 +227,59 @@ class ZTSelector:
                 'invt': 2,
                 'fid': 'f3',  # 排序字段，f3表示涨跌幅
                 'fs': 'm:0 t:6,m:0 t:80,m:1 t:2,m:1 t:23,m:0 t:81 s:2048',  # 沪深A股
-                'fields': 'f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f12,f13,f14,f15,f16,f17,f18,f20,f21,f23,f24,f25,f22,f11,f62,f128,f136,f115,f152',
+                'fields': 'f2,f3,f6,f8,f9,f10,f12,f14,f20',  # 只请求筛选、评分和输出用到的字段
                 '_': int(time.time() * 1000),
             }
             
+            # 缓存按接口和参数(不含时间戳)区分，同一请求始终覆盖同一个文件，有效期由cache_ttl控制
+            cache_ttl = self.config["output"]["cache_ttl"]
+            cache_params = sorted((k, v) for k, v in params.items() if k != '_')
+            cache_key = hashlib.md5(repr((self.stock_api, cache_params)).encode()).hexdigest()
+            cache_path = os.path.join(self._cache_dir, f"{cache_key}.json")
+            if cache_ttl > 0 and os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < cache_ttl:
+                try:
+                    with open(cache_path, 'rb') as f:
+                        cached_data = _json.loads(f.read())['data']['diff']
+                    logger.info("使用缓存的市场数据...")
+                    return cached_data
+                except Exception as e:
+                    logger.warning(f"读取市场数据缓存失败，重新获取: {e}")
+            
             logger.info("正在获取市场数据...")
-            response = requests.get(self.stock_api, headers=self.headers, params=params)
+            response = self.session.get(self.stock_api, params=params, timeout=(3, 10), stream=False)
             response.raise_for_status()
             
-            data = json.loads(response.text)
+            data = _json.loads(response.content)
             if data['data'] is None:
                 logger.error(f"API返回错误: {data}")
                 return None
+            
+            if cache_ttl > 0:
+                # 先写入临时文件再替换，避免中断时留下不完整的缓存
+                # 缓存只是优化，写入失败时仍返回已获取的数据
+                tmp_path = cache_path + '.tmp'
+                try:
+                    os.makedirs(self._cache_dir, exist_ok=True)
+                    with open(tmp_path, 'wb') as f:
+                        f.write(response.content)
+                    os.replace(tmp_path, cache_path)
+                except OSError as e:
+                    logger.warning(f"写入市场数据缓存失败: {e}")
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
                 
             return data['data']['diff']
         except Exception as e:
             logger.error(f"获取市场数据失败: {e}")
             return None
     
-    def calculate_continuous_limit_up(self, stock_code):
-        """计算股票连续涨停天数(模拟实现,实际应通过历史数据API)"""
-        # 此处为示例实现,真实场景下应该调用历史数据API获取
-        return 1
+    def calculate_continuous_limit_up_batch(self, stock_codes):
+        """批量计算股票连续涨停天数，返回与stock_codes顺序一致的整数数组(模拟实现,实际应通过历史数据API)"""
+        # 此处为示例实现,真实场景下应该一次性批量请求所有股票的历史K线(secid以逗号分隔)，
+        # 在一次遍历中解析出每只股票的连板数，而不是逐只请求
+        return np.ones(len(stock_codes), dtype=np.int64)
     
     def filter_stocks(self, stock_list):
         """筛选涨停股票"""
@@ -221,136 +287,77 @@ class ZTSelector:
             logger.error("没有输入股票数据")
             return []
         
+        # 延迟导入pandas，没有数据时不必承担导入开销
+        import pandas as pd
+        
         logger.info(f"开始筛选，原始股票数量: {len(stock_list)}")
         
-        # 获取配置并进行安全检查
+        # 获取筛选配置(加载配置时已验证类型和范围)
         config = self.config["filter"]
+        max_price = config["max_price"]
+        min_limit_up_percent = config["min_limit_up_percent"]
+        exclude_st = config["exclude_st"]
+        exclude_sci_tech_board = config["exclude_sci_tech_board"]
+        stock_prefix = config["stock_prefix"]
         
-        # 安全获取配置项，如果出错使用默认值
-        try:
-            max_price = float(config.get("max_price", 40))
-            min_limit_up_percent = float(config.get("min_limit_up_percent", 9.5))
-            exclude_st = bool(config.get("exclude_st", True))
-            exclude_sci_tech_board = bool(config.get("exclude_sci_tech_board", True))
-            stock_prefix = config.get("stock_prefix", ["0", "6"])
-            
-            # 确保stock_prefix是列表
-            if not isinstance(stock_prefix, list):
-                stock_prefix = ["0", "6"]
-                logger.warning("stock_prefix不是列表，使用默认值['0', '6']")
-            
-            # 如果stock_prefix为空列表，使用默认值
-            if len(stock_prefix) == 0:
-                stock_prefix = ["0", "6"]
-                logger.warning("stock_prefix为空列表，使用默认值['0', '6']")
-                
-        except Exception as e:
-            logger.error(f"获取筛选配置时出错: {e}，使用默认值")
-            max_price = 40
-            min_limit_up_percent = 9.5
-            exclude_st = True
-            exclude_sci_tech_board = True
-            stock_prefix = ["0", "6"]
+        # 只取筛选条件用到的字段，一次性构建DataFrame
+        df = pd.DataFrame(stock_list, columns=['f2', 'f3', 'f12', 'f14'])
+        
+        # 统一转换价格和涨跌幅，无法转换的数据(如停牌股票的'-')整体剔除
+        df['f2'] = pd.to_numeric(df['f2'], errors='coerce')
+        df['f3'] = pd.to_numeric(df['f3'], errors='coerce')
+        total_count = len(df)
+        df = df.dropna(subset=['f2', 'f3', 'f12', 'f14'])
+        if len(df) < total_count:
+            logger.info(f"剔除{total_count - len(df)}只价格或涨跌幅数据无效的股票")
+        
+        codes = df['f12'].astype(str)
+        names = df['f14'].astype(str)
+        prices = df['f2'].to_numpy()
+        change_percents = df['f3'].to_numpy()
         
         # 第一步：仅保留指定前缀的股票
-        prefix_filtered = []
-        for stock in stock_list:
-            try:
-                stock_code = stock.get('f12', '')
-                if any(stock_code.startswith(prefix) for prefix in stock_prefix):
-                    prefix_filtered.append(stock)
-            except Exception as e:
-                logger.warning(f"筛选股票前缀时出错, 股票: {stock.get('f12', 'unknown')}, 错误: {e}")
+        if all(len(prefix) == 1 for prefix in stock_prefix):
+            # 前缀均为单个字符时，只需对代码首字符做一次集合查找
+            mask = codes.str[:1].isin(frozenset(stock_prefix)).to_numpy(dtype=bool, copy=True)
+        else:
+            mask = codes.str.startswith(tuple(stock_prefix)).to_numpy(dtype=bool, copy=True)
+        prefix_count = int(mask.sum())
         
         # 第二步：排除ST股票
-        non_st_stocks = prefix_filtered
         if exclude_st:
-            non_st_stocks = []
-            for stock in prefix_filtered:
-                try:
-                    stock_name = stock.get('f14', '')
-                    if 'ST' not in stock_name:
-                        non_st_stocks.append(stock)
-                except Exception as e:
-                    logger.warning(f"排除ST股票时出错, 股票: {stock.get('f12', 'unknown')}, 错误: {e}")
+            mask &= ~names.str.contains('ST', regex=False).to_numpy()
+        non_st_count = int(mask.sum())
         
         # 第三步：排除科创板股票
-        filtered_stocks = non_st_stocks
         if exclude_sci_tech_board:
-            filtered_stocks = []
-            for stock in non_st_stocks:
-                try:
-                    stock_code = stock.get('f12', '')
-                    if not stock_code.startswith('688'):
-                        filtered_stocks.append(stock)
-                except Exception as e:
-                    logger.warning(f"排除科创板股票时出错, 股票: {stock.get('f12', 'unknown')}, 错误: {e}")
+            mask &= ~codes.str.startswith('688').to_numpy()
+        filtered_count = int(mask.sum())
         
-        # 第四步：排除高价股
-        low_price_stocks = []
-        for stock in filtered_stocks:
-            try:
-                # 获取价格
-                price_raw = stock.get('f2', 0)
-                
-                # 尝试转换价格
-                try:
-                    # 如果价格是字符串，转换为浮点数
-                    if isinstance(price_raw, str):
-                        price = float(price_raw.replace(',', ''))
-                    else:
-                        price = float(price_raw)
-                    
-                    # 根据价格范围判断是否需要转换
-                    if price < 1:  # 如果价格非常小，可能需要乘以1000
-                        price = price * 1000
-                    elif price > 1000:  # 如果价格非常大，可能需要除以1000
-                        price = price / 1000
-                    
-                    # 判断是否低于最高价格
-                    if price <= max_price:
-                        low_price_stocks.append(stock)
-                except Exception as e:
-                    logger.warning(f"处理股票价格时出错, 价格: {price_raw}, 错误: {e}")
-            except Exception as e:
-                logger.warning(f"筛选高价股时出错, 股票: {stock.get('f12', 'unknown')}, 错误: {e}")
+        # 第四步：排除高价股(fltt=2时接口价格单位已是元)
+        mask &= prices <= max_price
+        low_price_count = int(mask.sum())
         
         # 第五步：筛选涨停股票
-        limit_up_stocks = []
+        mask &= change_percents >= min_limit_up_percent
         
-        for stock in low_price_stocks:
-            try:
-                # 获取涨跌幅
-                change_percent_raw = stock.get('f3', 0)
-                
-                # 尝试转换涨跌幅
-                try:
-                    # 如果是字符串，去除百分号
-                    if isinstance(change_percent_raw, str):
-                        change_percent = float(change_percent_raw.replace('%', ''))
-                    else:
-                        change_percent = float(change_percent_raw)
-                    
-                    # 判断是否涨停
-                    if change_percent >= min_limit_up_percent:
-                        limit_up_stocks.append(stock)
-                except Exception as e:
-                    logger.warning(f"处理涨跌幅时出错, 涨跌幅: {change_percent_raw}, 错误: {e}")
-            except Exception as e:
-                logger.warning(f"筛选涨停股票时出错, 股票: {stock.get('f12', 'unknown')}, 错误: {e}")
+        # 按合并后的掩码直接取回原始股票记录，不再复制中间列表
+        limit_up_stocks = [stock_list[i] for i in df.index[mask]]
         
         # 输出筛选结果数量
-        logger.info(f"筛选结果: 前缀筛选后:{len(prefix_filtered)}只, 排除ST后:{len(non_st_stocks)}只, "
-                  f"排除科创板后:{len(filtered_stocks)}只, 排除高价股后:{len(low_price_stocks)}只, "
+        logger.info(f"筛选结果: 前缀筛选后:{prefix_count}只, 排除ST后:{non_st_count}只, "
+                  f"排除科创板后:{filtered_count}只, 排除高价股后:{low_price_count}只, "
                   f"最终涨停股票:{len(limit_up_stocks)}只")
         
         return limit_up_stocks
     
-    def score_stocks(self, stock_list):
-        """给涨停股票评分"""
+    def score_stocks(self, stock_list, top_count=None):
+        """给涨停股票评分，返回评分最高的前top_count只股票(默认取配置中的top_count)"""
         if not stock_list:
             return []
         
+        import pandas as pd
+        
         # 获取评分配置
         score_config = self.config["score"]
         base_score = score_config["base_score"]
@@ -360,62 +367,51 @@ class ZTSelector:
         amount_weight = score_config["amount_weight"]
         amount_max_score = score_config["amount_max_score"]
         
+        if top_count is None:
+            top_count = self.config["output"]["top_count"]
+        
+        # 一次性提取评分字段为float64数组，无效值按0处理
+        fields = pd.DataFrame.from_records(stock_list, columns=['f10', 'f8', 'f6', 'f20'])
+        fields = fields.apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        volume_ratio, turnover_rate, amount, market_cap = np.ascontiguousarray(fields.T)
+        amount = amount / 100000000  # 转换为亿元
+        market_cap = market_cap / 100000000  # 流通市值,亿元
+        
+        # 批量计算连板数(实际应通过历史行情获取)
+        continuous_limit_up = self.calculate_continuous_limit_up_batch([s.get('f12', '') for s in stock_list])
+        
+        # 涨停股票评分逻辑
+        # 1. 基础分值 2. 量比、换手率加分 3. 连板数加分 4. 成交额加分(有上限)
+        # 5. 流通市值适中加分(10-50亿加10分，50-100亿加5分)
+        scores = _score_kernel(volume_ratio, turnover_rate, continuous_limit_up.astype(np.float64), amount, market_cap,
+                               float(base_score), float(volume_ratio_weight), float(turnover_rate_weight),
+                               float(continuous_limit_up_weight), float(amount_weight), float(amount_max_score))
+        
+        # 按评分稳定排序取前N只，评分相同时保持接口返回的原始顺序
+        top_idx = np.argsort(-scores, kind='stable')[:top_count]
+        
+        # 只为入选股票记录评分和推荐理由
         scored_stocks = []
-        for stock in stock_list:
-            score = 0
-            
-            # 基础分数
-            change_percent = float(stock.get('f3', 0))
-            volume_ratio = float(stock.get('f10', 0))
-            turnover_rate = float(stock.get('f8', 0))
-            amount = float(stock.get('f6', 0)) / 100000000  # 转换为亿元
-            market_cap = float(stock.get('f20', 0)) / 100000000  # 流通市值,亿元
-            
-            # 计算连板数(实际应通过历史行情获取)
-            stock_code = stock.get('f12', '')
-            continuous_limit_up = self.calculate_continuous_limit_up(stock_code)
-            
-            # 涨停股票评分逻辑
-            # 1. 基础分值
-            score += base_score  # 涨停基础分
-            
-            # 2. 成交量和换手率评分
-            score += volume_ratio * volume_ratio_weight  # 量比加分
-            score += turnover_rate * turnover_rate_weight  # 换手率加分
-            
-            # 3. 连板数加分
-            score += continuous_limit_up * continuous_limit_up_weight
-            
-            # 4. 成交额加分
-            score += min(amount * amount_weight, amount_max_score)  # 成交额加分，最多15分
-            
-            # 5. 流通市值适中加分(10-50亿)
-            if 10 <= market_cap <= 50:
-                score += 10
-            elif 50 < market_cap <= 100:
-                score += 5
-            
-            # 记录评分和推荐理由
+        for i in top_idx:
             reason = []
-            if volume_ratio > 1.5:
-                reason.append(f"量比高({volume_ratio:.2f})")
-            if turnover_rate > 3:
-                reason.append(f"换手率高({turnover_rate:.2f}%)")
-            if continuous_limit_up > 1:
-                reason.append(f"连续涨停{continuous_limit_up}天")
-            if 10 <= market_cap <= 50:
-                reason.append(f"流通市值适中({market_cap:.2f}亿)")
-            if amount > 5:
-                reason.append(f"成交活跃({amount:.2f}亿)")
-            
-            stock['score'] = score
+            if volume_ratio[i] > 1.5:
+                reason.append(f"量比高({volume_ratio[i]:.2f})")
+            if turnover_rate[i] > 3:
+                reason.append(f"换手率高({turnover_rate[i]:.2f}%)")
+            if continuous_limit_up[i] > 1:
+                reason.append(f"连续涨停{continuous_limit_up[i]}天")
+            if 10 <= market_cap[i] <= 50:
+                reason.append(f"流通市值适中({market_cap[i]:.2f}亿)")
+            if amount[i] > 5:
+                reason.append(f"成交活跃({amount[i]:.2f}亿)")
+            
+            stock = stock_list[i]
+            stock['score'] = float(scores[i])
             stock['reason'] = "、".join(reason) if reason else "综合指标评分"
-            stock['continuous_limit_up'] = continuous_limit_up
+            stock['continuous_limit_up'] = int(continuous_limit_up[i])
             
             scored_stocks.append(stock)
         
-        # 按评分排序
-        scored_stocks.sort(key=lambda x: x['score'], reverse=True)
         return scored_stocks
     
     def run(self):
@@ -427,13 +423,20 @@ class ZTSelector:
             logger.info("开始涨停股票筛选")
             logger.info("=" * 50)
             
-            # 创建输出目录
-            if not os.path.exists(self.output_dir):
-                os.makedirs(self.output_dir)
-                logger.info(f"创建输出目录: {self.output_dir}")
+            # 在后台线程获取市场数据，网络请求期间同时完成本地准备工作
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future_data = executor.submit(self.get_market_data)
+                
+                # 确保输出目录仍然存在(定时重复运行时目录可能已被删除)
+                os.makedirs(self.output_dir, exist_ok=True)
+                
+                # 预先编译(或从缓存加载)numba评分内核
+                if njit is not None:
+                    empty = np.zeros(1)
+                    _score_kernel(empty, empty, empty, empty, empty, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+                
+                stock_list = future_data.result()
             
-            # 获取市场数据
-            stock_list = self.get_market_data()
             if not stock_list:
                 logger.error("获取市场数据失败")
                 return
@@ -448,12 +451,9 @@ class ZTSelector:
                 logger.warning("今日没有涨停股票")
                 return
             
-            # 评分并排序
-            recommended_stocks = self.score_stocks(limit_up_stocks)
-            
-            # 取前N只股票作为推荐
+            # 评分并取前N只股票作为推荐(仅为入选股票生成推荐理由)
             top_count = self.config["output"]["top_count"]
-            top_stocks = recommended_stocks[:top_count]
+            top_stocks = self.score_stocks(limit_up_stocks, top_count)
             
             if not top_stocks:
                 logger.warning("评分后没有推荐股票")
@@ -524,39 +524,37 @@ class ZTSelector:
             return None
         
         try:
-            # 提取需要的字段
-            data = []
-            for stock in stock_list:
-                data.append({
-                    '代码': stock.get('f12', ''),
-                    '名称': stock.get('f14', ''),
-                    '现价': stock.get('f2', 0),  
-                    '涨跌幅(%)': stock.get('f3', 0),
-                    '成交额(亿)': stock.get('f6', 0) / 100000000,
-                    '换手率(%)': stock.get('f8', 0),
-                    '量比': stock.get('f10', 0),
-                    '流通市值(亿)': stock.get('f20', 0) / 100000000,
-                    '市盈率': stock.get('f9', 0),
-                    '连板数': stock.get('continuous_limit_up', 1),
-                    '评分': stock.get('score', 0),
-                    '推荐理由': stock.get('reason', '')
-                })
-            
-            # 创建DataFrame
-            df = pd.DataFrame(data)
-            
             # 获取当前日期作为文件名
             today = datetime.now().strftime('%Y%m%d')
             
-            # 确保输出目录存在
-            if not os.path.exists(self.output_dir):
-                os.makedirs(self.output_dir)
-            
             # 创建完整的文件路径（使用绝对路径）
-            file_name = os.path.join(os.path.abspath(self.output_dir), f"涨停优选股_{today}.xlsx")
+            file_name = os.path.join(self._abs_output_dir, f"涨停优选股_{today}.xlsx")
             
-            # 保存到Excel
-            df.to_excel(file_name, index=False)
+            # 直接用xlsxwriter逐行写入Excel，constant_memory模式按行流式写入磁盘
+            headers = ['代码', '名称', '现价', '涨跌幅(%)', '成交额(亿)', '换手率(%)', '量比',
+                       '流通市值(亿)', '市盈率', '连板数', '评分', '推荐理由']
+            workbook = xlsxwriter.Workbook(file_name, {'constant_memory': True})
+            try:
+                worksheet = workbook.add_worksheet('推荐')
+                worksheet.set_column('A:L', 12)
+                worksheet.write_row(0, 0, headers)
+                for row, stock in enumerate(stock_list, 1):
+                    worksheet.write_row(row, 0, [
+                        stock.get('f12', ''),
+                        stock.get('f14', ''),
+                        stock.get('f2', 0),
+                        stock.get('f3', 0),
+                        stock.get('f6', 0) / 100000000,
+                        stock.get('f8', 0),
+                        stock.get('f10', 0),
+                        stock.get('f20', 0) / 100000000,
+                        stock.get('f9', 0),
+                        stock.get('continuous_limit_up', 1),
+                        stock.get('score', 0),
+                        stock.get('reason', '')
+                    ])
+            finally:
+                workbook.close()
             logger.info(f"推荐结果已保存到: {file_name}")
             return file_name
             